@@ -1,16 +1,65 @@
-import json
+import atexit
 import os
 import sys
+import tempfile
+import threading
+import weakref
 from pathlib import Path
 from typing import Dict, Any
 
+import orjson
+
+try:
+    import simdjson
+    # 复用同一个解析器，避免每次加载重新分配内部缓冲区
+    _PARSER = simdjson.Parser()
+except ImportError:  # 可选依赖，未安装时只使用orjson
+    _PARSER = None
+
+# 超过该大小的配置文件改用simdjson解析，小文件orjson更快
+_SIMDJSON_THRESHOLD = 50 * 1024
+
+# 配置写入防抖间隔(秒)，期间的多次修改合并为一次写入
+_SAVE_DELAY = 1.0
+
+# 所有存活的 CommandMapper，仅持有弱引用，不影响实例回收
+_MAPPERS: "weakref.WeakSet[CommandMapper]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    """进程退出时写入所有尚未保存的修改"""
+    for mapper in list(_MAPPERS):
+        mapper._flush()
+
+
+def _loads(data: bytes) -> Any:
+    """按数据大小选择JSON解析器"""
+    if _PARSER is not None and len(data) >= _SIMDJSON_THRESHOLD:
+        return _PARSER.parse(data).as_dict()
+    return orjson.loads(data)
+
 
 class CommandMapper:
     def __init__(self, config_path: str = "./conf/command_mappings.json"):
         self.config_path = Path(config_path)
+        self._mtime = self._config_mtime()
         self.command_mappings = self._load_config()
         self.system = self._detect_system()
 
+        self._dirty = False
+        self._save_failed = False
+        self._save_timer = None
+        self._save_lock = threading.Lock()
+        _MAPPERS.add(self)
+
+    def _config_mtime(self) -> int:
+        """获取配置文件修改时间(纳秒)，文件不存在时返回0"""
+        try:
+            return self.config_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
     def _detect_system(self) -> str:
         """检测操作系统类型"""
         if sys.platform.startswith('win'):
@@ -24,9 +73,26 @@ class CommandMapper:
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            # 无缓冲二进制读取，跳过 TextIOWrapper/BufferedReader，按文件大小一次读完
+            with open(self.config_path, 'rb', buffering=0) as f:
+                raw = _loads(f.readall())
+            # 命令名统一小写并驻留，后续查找只需比较指针
+            mappings = {}
+            for cmd, mapping in raw.items():
+                key = sys.intern(cmd.lower())
+                if key not in mappings:
+                    mappings[key] = mapping
+                    continue
+                print(f"命令映射配置中 '{cmd}' 与已有命令重复(忽略大小写)，已合并到 '{key}'")
+                # 原本就是小写的键优先
+                if cmd == key:
+                    mappings[key] = {**mappings[key], **mapping}
+                else:
+                    mappings[key] = {**mapping, **mappings[key]}
+            return mappings
+        except (FileNotFoundError, ValueError, TypeError, AttributeError):
+            # orjson.JSONDecodeError 与 simdjson 的解析错误均为 ValueError 子类；
+            # 根节点不是对象时 as_dict() 抛出 TypeError，orjson 结果没有 items()
             # 默认配置
             return {
                 "ls": {
@@ -38,15 +104,85 @@ class CommandMapper:
             }
 
     def _save_config(self):
-        """保存配置到文件"""
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.command_mappings, f, indent=2, ensure_ascii=False)
+        """保存配置到文件(先写临时文件再替换，避免写入中断导致文件损坏)"""
+        # 每次写入使用同目录下唯一的临时文件，多个进程同时保存时互不干扰
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.config_path.parent, prefix=self.config_path.name + '.', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # orjson 始终输出 UTF-8，等价于 ensure_ascii=False
+                f.write(orjson.dumps(self.command_mappings, option=orjson.OPT_INDENT_2))
+                # 替换前先落盘，避免掉电后留下空文件
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp 创建的文件权限为 0600，沿用原配置文件的权限
+            try:
+                mode = self.config_path.stat().st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.config_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if os.name == 'posix':
+            # 同步目录项，确保 rename 本身也已持久化
+            dir_fd = os.open(self.config_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self._mtime = self._config_mtime()
+
+    def _schedule_save(self):
+        """标记配置已修改，延迟 _SAVE_DELAY 秒后写入(重复调用会重新计时)"""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(_SAVE_DELAY, self._flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _flush(self):
+        """立即写入尚未保存的修改"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            try:
+                self._save_config()
+            except (IOError, PermissionError) as e:
+                self._save_failed = True
+                print(f"命令映射配置保存失败: {e}")
+                return
+            self._dirty = False
+            self._save_failed = False
+
+    def get_mappings(self) -> Dict[str, Any]:
+        """
+        获取当前命令映射
+        仅在配置文件被外部修改(mtime变化)时重新加载，有未保存的修改时不重新加载
+        """
+        mtime = self._config_mtime()
+        if mtime != self._mtime and not self._dirty:
+            self.command_mappings = self._load_config()
+            self._mtime = mtime
+        return self.command_mappings
 
     def get_command(self, original_cmd: str) -> str:
         """
         获取适用于当前系统的命令
         如果发现新映射会自动更新配置
         """
+        original_cmd = sys.intern(original_cmd.lower())
+
         # 检查命令是否已存在映射
         if original_cmd in self.command_mappings:
             sys_cmd = self.command_mappings[original_cmd].get(self.system)
@@ -60,7 +196,7 @@ class CommandMapper:
             }
         if new_mapping:
             self.command_mappings[original_cmd] = new_mapping
-            self._save_config()
+            self._schedule_save()
             return new_mapping.get(self.system, original_cmd)
 
         return original_cmd
@@ -80,13 +216,15 @@ class CommandMapper:
                 1 - 无效平台
                 2 - 映射已存在且相同
                 3 - 映射已存在但不同（已更新）
-                4 - 文件写入失败
+                4 - 文件写入失败(写入为延迟执行，此时表示上一次写入失败)
         """
         # 验证平台有效性
         valid_platforms = ['windows', 'linux', 'darwin']
         if platform not in valid_platforms:
             return 1
 
+        original_cmd = sys.intern(original_cmd.lower())
+
         # 检查是否已存在相同映射
         existing_mapping = self.command_mappings.get(original_cmd, {})
         if platform in existing_mapping:
@@ -103,10 +241,9 @@ class CommandMapper:
             self.command_mappings[original_cmd][platform] = mapped_cmd
             return_code = 0
 
-        # 尝试保存到文件
-        try:
-            self._save_config()
-        except (IOError, PermissionError):
+        # 延迟保存到文件，短时间内的多次修改只写一次
+        self._schedule_save()
+        if self._save_failed:
             return 4
 
         return return_code
@@ -1,16 +1,42 @@
+import atexit
+import hashlib
 import os
 import platform
+import re
+import shelve
 import shlex
 import subprocess
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
-import requests
-from typing import Tuple, Optional, Union, List
+import httpx
+import orjson
+from typing import Callable, Tuple, Optional, Union, List
 import json
 
 from CommendMapper import CommandMapper
 from command import run_command
 
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    _HTTP2 = True
+except ImportError:  # 未安装 httpx[http2] 时退回 HTTP/1.1 长连接
+    _HTTP2 = False
+
+
+_QUOTE_CHARS = ('"', "'", "\\")
+
+# 链式命令分隔符，捕获分组以保留分隔符本身
+_CHAIN_SEP = re.compile(r'\s*(&&|;)\s*')
+
+
+def _fast_split(command: str) -> List[str]:
+    """拆分命令参数，不含引号和转义时直接按空白拆分，否则回退到shlex"""
+    if any(c in command for c in _QUOTE_CHARS):
+        return shlex.split(command)
+    return command.split()
+
 
 class DeepSeekCLIExecutor:
     def __init__(self, api_key: str):
@@ -22,15 +48,28 @@ class DeepSeekCLIExecutor:
         self.current_platform = platform.system().lower()  # windows/linux/darwin
         self.api_key = api_key
         self.base_url = "https://api.deepseek.com/v1"
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        })
+        # HTTP/2 长连接，多次请求复用同一个TLS连接 (需要 pip install httpx[http2])
+        self.session = httpx.Client(
+            http2=_HTTP2,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
         self.command_map = CommandMapper()
+        # DeepSeek响应的磁盘缓存，相同的报错信息无需重复请求
+        self._cache = self._open_cache("./conf/ai_cache.db")
+        # shelve 非线程安全，且 dbm.sqlite3 后端(Python 3.13+)不能跨线程使用，
+        # 只在创建它的线程中加锁访问
+        self._cache_lock = threading.Lock()
+        # 后台线程池，复用 self.session 并发发起DeepSeek请求(只做网络请求，不读写缓存)
+        self._pool = ThreadPoolExecutor(max_workers=2)
 
         # 常见命令的快速映射表
-        self.command_mappings = self.command_map._load_config()
+        self.command_mappings = self.command_map.get_mappings()
+        self._platform_map = self._build_platform_map()
 
         '''
         {
@@ -43,25 +82,222 @@ class DeepSeekCLIExecutor:
         }
         '''
 
-    def _call_deepseek(self, prompt: str) -> Optional[str]:
-        """调用DeepSeek API获取响应"""
+    def _build_platform_map(self) -> dict:
+        """构建当前平台的扁平映射表 {命令: 当前平台命令}"""
+        platform_name = self.current_platform
+        return {
+            cmd: m[platform_name]
+            for cmd, m in self.command_mappings.items()
+            if platform_name in m
+        }
+
+    def _build_payload(self, prompt: str, json_mode: bool = False) -> dict:
+        """构建chat/completions请求体"""
+        payload = {
+            "model": "deepseek-chat",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.1,
+            "max_tokens": 1000
+        }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    @staticmethod
+    def _parse_content(body: bytes) -> str:
+        """从响应体原始字节中提取模型回复内容"""
+        return orjson.loads(body)["choices"][0]["message"]["content"].strip()
+
+    @staticmethod
+    def _open_cache(path: str) -> Optional[shelve.Shelf]:
+        """打开响应缓存，无法创建时禁用缓存并返回None"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cache = shelve.open(path)
+        except Exception as e:
+            # 文件损坏时各后端抛出的异常不同: dbm.error[0] 不是 OSError 子类，
+            # dbm.dumb 用 ast.literal_eval 读取被截断的 .dir 索引时抛出 SyntaxError/ValueError
+            print(f"DeepSeek响应缓存不可用: {e}")
+            return None
+        atexit.register(cache.close)
+        return cache
+
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        """计算提示词的缓存键"""
+        return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """读取响应缓存，未命中或读取失败返回None"""
+        if self._cache is None:
+            return None
+        try:
+            with self._cache_lock:
+                return self._cache.get(key)
+        except Exception as e:
+            print(f"读取DeepSeek响应缓存失败: {e}")
+            return None
+
+    def _cache_put(self, key: str, result: str):
+        """写入响应缓存，写入失败时忽略"""
+        if self._cache is None:
+            return
+        try:
+            with self._cache_lock:
+                self._cache[key] = result
+                self._cache.sync()
+        except Exception as e:
+            print(f"写入DeepSeek响应缓存失败: {e}")
+
+    def _request_deepseek(self, prompt: str, json_mode: bool = False) -> Optional[str]:
+        """请求DeepSeek API，不读写缓存，可在线程池中调用"""
         try:
             response = self.session.post(
                 f"{self.base_url}/chat/completions",
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.1,
-                    "max_tokens": 1000
-                },
-                timeout=10
+                json=self._build_payload(prompt, json_mode)
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"].strip()
+            return self._parse_content(response.content)
         except Exception as e:
             print(f"DeepSeek API调用失败: {e}")
             return None
 
+    def _call_deepseek(self, prompt: str, json_mode: bool = False,
+                       validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        调用DeepSeek API获取响应
+
+        :param prompt: 提示词
+        :param json_mode: 是否要求模型返回JSON对象
+        :param validate: 校验网络响应的函数，返回False时不写入缓存(下次重新请求)
+        """
+        key = self._cache_key(prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        result = self._request_deepseek(prompt, json_mode)
+        if result is not None and (validate is None or validate(result)):
+            self._cache_put(key, result)
+        return result
+
+    def _submit_deepseek(self, prompts: List[str]) -> List[Tuple[str, Union[str, Future]]]:
+        """
+        在线程池中并发发起多个DeepSeek请求，缓存命中的不再请求
+
+        :param prompts: 提示词列表
+        :return: [(缓存键, 缓存结果或请求Future)]，交给 _collect_deepseek 取结果
+        """
+        pending = []
+        for prompt in prompts:
+            key = self._cache_key(prompt)
+            cached = self._cache_get(key)
+            if cached is None:
+                cached = self._pool.submit(self._request_deepseek, prompt)
+            pending.append((key, cached))
+        return pending
+
+    def _collect_deepseek(self, pending: List[Tuple[str, Union[str, Future]]]) -> List[Optional[str]]:
+        """等待 _submit_deepseek 发起的请求完成，在当前线程写入缓存"""
+        results = []
+        for key, item in pending:
+            if isinstance(item, Future):
+                item = item.result()
+                if item is not None:
+                    self._cache_put(key, item)
+            results.append(item)
+        return results
+
+    def _lookup_local(self, command: str) -> Optional[Tuple[bool, Optional[str]]]:
+        """
+        在本地映射表中判断命令
+
+        :return: (是否适用, 转换后的命令或None)，映射表中没有该命令时返回None
+        """
+        # 提取基础命令(第一个单词)和参数
+        parts = command.strip().split(None, 1)
+        base_cmd = sys.intern(parts[0].lower())
+
+        # 检查快速映射表
+        translated = self._platform_map.get(base_cmd)
+        if translated is not None:
+            # 需要转换
+            if len(parts) == 2:
+                translated += ' ' + parts[1]
+            return False, translated
+        if base_cmd in self.command_mappings:
+            # 命令在当前平台有原生支持
+            return True, None
+        return None
+
+    @staticmethod
+    def _parse_verdict(result) -> Optional[Tuple[bool, str]]:
+        """
+        校验模型返回的单条判断结果
+
+        :return: (是否适用, 转换后的命令)，格式不符(native非布尔、translated非字符串)时返回None
+        """
+        if not isinstance(result, dict):
+            return None
+        native = result.get("native")
+        translated = result.get("translated", "")
+        if translated is None:
+            translated = ""
+        if not isinstance(native, bool) or not isinstance(translated, str):
+            return None
+        return native, translated
+
+    def _parse_verdict_reply(self, response: Optional[str]) -> Optional[Tuple[bool, str]]:
+        """解析单条命令判断的JSON回复，格式不符时返回None"""
+        try:
+            return self._parse_verdict(orjson.loads(response))
+        except (TypeError, orjson.JSONDecodeError):
+            return None
+
+    def _parse_batch_reply(self, response: Optional[str],
+                           count: int) -> Optional[List[Tuple[bool, str]]]:
+        """解析批量判断的JSON回复，数量或任一条格式不符时返回None"""
+        try:
+            results = orjson.loads(response)["results"]
+        except (TypeError, KeyError, orjson.JSONDecodeError):
+            return None
+        if not isinstance(results, list) or len(results) != count:
+            return None
+        parsed = [self._parse_verdict(r) for r in results]
+        return parsed if all(p is not None for p in parsed) else None
+
+    def _batch_classify(self, commands: List[str]) -> List[Tuple[bool, Optional[str]]]:
+        """
+        批量判断多条命令是否适用于当前平台，本地无法判断的命令合并为一次DeepSeek请求
+
+        :param commands: 命令列表
+        :return: 与commands一一对应的 (是否适用, 转换后的命令或None)
+        """
+        verdicts = [self._lookup_local(cmd) for cmd in commands]
+        unknown = [i for i, v in enumerate(verdicts) if v is None]
+        if not unknown:
+            return verdicts
+
+        listing = "\n".join(f"{n}. {commands[i]}" for n, i in enumerate(unknown, 1))
+        prompt = self._platform_prompt(
+            listing,
+            '{"results": [{"native": true或false, "translated": "转换后的命令"}, ...]}，'
+            "results按顺序与命令一一对应"
+        )
+
+        response = self._call_deepseek(
+            prompt, json_mode=True,
+            validate=lambda r: self._parse_batch_reply(r, len(unknown)) is not None
+        )
+        parsed = self._parse_batch_reply(response, len(unknown)) or [None] * len(unknown)
+
+        for verdict, i in zip(parsed, unknown):
+            if verdict is not None and verdict[0]:
+                verdicts[i] = (True, None)
+            else:
+                translated = verdict[1] if verdict is not None else None
+                verdicts[i] = (False, translated if translated else commands[i])
+        return verdicts
+
     def is_command_for_current_platform(self, command: str) -> Tuple[bool, Optional[str]]:
         """
         判断命令是否适用于当前平台
@@ -69,76 +305,113 @@ class DeepSeekCLIExecutor:
         :param command: 输入命令
         :return: (是否适用, 转换后的命令或None)
         """
-        # 提取基础命令(第一个单词)
-        base_cmd = command.strip().split()[0].lower()
+        verdict = self._lookup_local(command)
+        if verdict is not None:
+            return verdict
+
+        # 使用DeepSeek进行复杂判断，一次请求同时完成判断和转换
+        prompt = self._platform_prompt(
+            f"命令: {command}",
+            '{"native": true或false, "translated": "转换后的命令"}'
+        )
 
-        # 检查快速映射表
-        if base_cmd in self.command_mappings:
-            if self.current_platform in self.command_mappings[base_cmd]:
-                # 需要转换
-                translated = self.command_mappings[base_cmd][self.current_platform]
-                if len(command.split()) > 1:
-                    translated += ' ' + ' '.join(command.split()[1:])
-                return False, translated
-            else:
-                # 命令在当前平台有原生支持
-                return True, None
-
-        # 使用DeepSeek进行复杂判断
-        prompt = (
-            f"请严格判断以下命令是否适用于{self.current_platform}系统，只需回答yes或no:\n"
-            f"命令: {command}\n"
-            "注意: 如果命令是跨平台的(如python, git等)回答yes\n"
-            "如果命令包含路径操作，考虑路径分隔符差异\n"
-            "回答: "
+        # 校验通过才缓存，格式错误的回复下次重新请求
+        response = self._call_deepseek(
+            prompt, json_mode=True,
+            validate=lambda r: self._parse_verdict_reply(r) is not None
         )
+        verdict = self._parse_verdict_reply(response)
+        if verdict is None:
+            return False, command
 
-        response = self._call_deepseek(prompt)
-        if response and response.lower().startswith('yes'):
+        native, translated = verdict
+        if native:
             return True, None
 
-        # 需要转换 - 获取转换后的命令
-        prompt = (
-            f"请将以下命令转换为适合{self.current_platform}系统的等效命令:\n"
-            f"原始命令: {command}\n"
-            "要求: 只返回转换后的命令，不要包含任何解释或额外文本\n"
-            "转换结果: "
-        )
-
-        translated = self._call_deepseek(prompt)
         return False, translated if translated else command
 
+    def _platform_prompt(self, commands_block: str, format_spec: str) -> str:
+        """
+        构建平台判断提示词，单条判断和批量判断共用
+
+        :param commands_block: 待判断的命令(单条或编号列表)
+        :param format_spec: 要求模型返回的JSON格式说明
+        """
+        return (
+            f"请严格判断以下命令是否适用于{self.current_platform}系统，"
+            f"如果不适用则将其转换为适合{self.current_platform}系统的等效命令:\n"
+            f"{commands_block}\n"
+            "注意: 如果命令是跨平台的(如python, git等)视为适用\n"
+            "如果命令包含路径操作，考虑路径分隔符差异\n"
+            f"要求: 只返回JSON，格式为 {format_spec}，"
+            "适用时translated为空字符串，不要包含任何解释或额外文本\n"
+        )
+
     def translate_output(self, output: str) -> str:
         """将命令输出翻译为中文"""
         if not output.strip():
             return ""
 
-        prompt = (
+        translated = self._call_deepseek(self._translate_prompt(output))
+        return translated if translated else output
+
+    def _translate_prompt(self, output: str) -> str:
+        """构建输出翻译提示词"""
+        return (
             "请将以下命令行输出翻译成简体中文，保持技术术语准确:\n"
             f"{output}\n"
             "翻译结果: "
         )
 
-        translated = self._call_deepseek(prompt)
-        return translated if translated else output
-
-    def execute_command(self, command: str) -> Tuple[int, str, str]:
+    def execute_command(
+            self,
+            command: str,
+            verdict: Optional[Tuple[bool, Optional[str]]] = None
+    ) -> Tuple[int, str, str]:
         """
         执行命令并返回结果
 
         :param command: 输入命令
+        :param verdict: 预先得到的平台判断结果(如批量判断)，None时同步判断
         :return: (返回码, 标准输出, 标准错误)
         """
+        returncode, stdout, stderr, pending = self._start_command(command, verdict)
+        if pending is not None:
+            stderr = self._finish_error_help(stderr, pending)
+        return returncode, stdout, stderr
+
+    def _start_command(
+            self,
+            command: str,
+            verdict: Optional[Tuple[bool, Optional[str]]] = None
+    ) -> Tuple[int, str, str, Optional[List[Tuple[str, Union[str, Future]]]]]:
+        """
+        执行命令，报错时只发起翻译和修复建议请求，不等待结果
+
+        :return: (返回码, 标准输出, 标准错误, 待 _finish_error_help 收集的请求或None)
+        """
         # 判断并转换命令
-        is_native, translated_cmd = self.is_command_for_current_platform(command)
+        if verdict is None:
+            verdict = self.is_command_for_current_platform(command)
+        is_native, translated_cmd = verdict
         final_cmd = command if is_native else (translated_cmd or command)
 
         print(f"执行命令: {final_cmd}")
 
         # 增加配置
-        cmd_in = shlex.split(final_cmd)
-        mapcode = self.command_map.add_mapping(cmd_in[0], self.current_platform, cmd_in[0])
-        self.command_mappings = self.command_map._load_config()
+        cmd_in = _fast_split(final_cmd)
+        base_cmd = cmd_in[0]
+        known = self.command_mappings.get(sys.intern(base_cmd.lower()), {}).get(self.current_platform)
+        mapcode = None
+        # 映射已存在且相同时跳过，避免每条命令都重复调用 add_mapping；
+        # 含大写的命令(如误输入的 Git)不记录，否则会把错误大小写写成全局映射
+        if base_cmd == base_cmd.lower() and known != base_cmd:
+            mapcode = self.command_map.add_mapping(base_cmd, self.current_platform, base_cmd)
+        mappings = self.command_map.get_mappings()
+        if mappings is not self.command_mappings or mapcode in (0, 3):
+            # 映射有变化时重建扁平映射表
+            self.command_mappings = mappings
+            self._platform_map = self._build_platform_map()
         # print("mapadd")
         # print(mapcode)
 
@@ -151,20 +424,18 @@ class DeepSeekCLIExecutor:
             #print(returncode,stdout,stderr)
             # 翻译输出
             if stderr:
-                tmp = stderr
-                stderr = self.translate_output(stderr)
-                suggestion = self.get_ai_suggestion(tmp,final_cmd)
-                print(suggestion)
+                # 翻译和修复建议互不依赖，在线程池中并发请求(共用同一个HTTP/2连接)
+                return returncode, stdout, stderr, self._request_error_help(stderr, final_cmd)
             else:
                 if stdout:  # 非ASCII输出才翻译
                     #stdout = self.translate_output(stdout)
                     stdout = stdout
-            return returncode, stdout, stderr
+            return returncode, stdout, stderr, None
         except Exception as e:
             print(str(e))
             error_msg = self.translate_output(str(e))
             print(error_msg)
-            return 1, "", f"A命令执行失败: {error_msg}"
+            return 1, "", f"A命令执行失败: {error_msg}", None
 
     def interactive_shell(self):
         """启动交互式命令行界面"""
@@ -180,7 +451,16 @@ class DeepSeekCLIExecutor:
                 if not user_input:
                     continue
 
-                returncode, stdout, stderr = self.execute_command(user_input)
+                chain = self._split_chain(user_input)
+                if len(chain) > 1:
+                    self._execute_chain(chain)
+                    continue
+                if not chain:
+                    # 只有分隔符，没有命令
+                    continue
+
+                # 使用拆分后的命令，去掉 `ls ;` 这类输入末尾的分隔符
+                returncode, stdout, stderr = self.execute_command(chain[0][1])
 
                 if stdout:
                     #print(stdout)
@@ -193,6 +473,59 @@ class DeepSeekCLIExecutor:
             except Exception as e:
                 print(f"\033[91m发生意外错误: {str(e)}\033[0m")
 
+    @staticmethod
+    def _split_chain(user_input: str) -> List[Tuple[str, str]]:
+        """
+        按 && 和 ; 拆分链式命令
+
+        :return: [(前一个分隔符, 命令)]，第一条命令的分隔符为空字符串；
+                 含引号或转义时不拆分
+        """
+        if any(c in user_input for c in _QUOTE_CHARS):
+            return [("", user_input)]
+
+        tokens = _CHAIN_SEP.split(user_input)
+        chain = []
+        sep = ""
+        for i, token in enumerate(tokens):
+            if i % 2:
+                sep = token
+            elif token:
+                chain.append((sep, token))
+        return chain
+
+    def _execute_chain(self, chain: List[Tuple[str, str]]):
+        """
+        依次执行链式命令，平台判断预先通过一次批量请求完成
+
+        报错的翻译和修复建议在后台请求，与下一条命令的执行重叠，下一条命令结束后再显示
+        """
+        verdicts = self._batch_classify([cmd for _, cmd in chain])
+
+        returncode = 0
+        previous = None  # 上一条命令的 (命令, 标准错误, 待收集的请求)
+        for (sep, cmd), verdict in zip(chain, verdicts):
+            if sep == "&&" and returncode != 0:
+                # && 前一条失败时跳过后续命令，与shell行为一致
+                continue
+            returncode, stdout, stderr, pending = self._start_command(cmd, verdict)
+            if previous is not None:
+                self._print_chain_error(*previous)
+            previous = (cmd, stderr, pending) if stderr else None
+            if returncode == -1:
+                # run_command 在 Ctrl+C 时返回 -1，与shell一致中止整个命令链
+                break
+        if previous is not None:
+            self._print_chain_error(*previous)
+
+    def _print_chain_error(self, cmd: str, stderr: str,
+                           pending: Optional[List[Tuple[str, Union[str, Future]]]]):
+        """显示链式命令中某条命令的报错，报错可能晚于后续命令的输出，因此带上命令本身"""
+        if pending is not None:
+            stderr = self._finish_error_help(stderr, pending)
+        if stderr:
+            print(f"\033[91m{cmd}: {stderr}\033[0m")  # 红色显示错误
+
     def get_ai_suggestion(self,error_message: str, cmd: str, model: str = "deepseek-chat") -> str:
         """
         使用DeepSeek大模型获取错误修复建议
@@ -204,7 +537,30 @@ class DeepSeekCLIExecutor:
         返回:
             AI生成的修复建议
         """
-        prompt = (
+        prompt = self._suggestion_prompt(error_message, cmd)
+        print(prompt)
+        result = self._call_deepseek(prompt)
+        return result
+
+    def _request_error_help(self, stderr: str, cmd: str) -> List[Tuple[str, Union[str, Future]]]:
+        """并发发起报错翻译和修复建议请求，空白报错只请求修复建议"""
+        prompt = self._suggestion_prompt(stderr, cmd)
+        print(prompt)
+        prompts = [self._translate_prompt(stderr)] if stderr.strip() else []
+        return self._submit_deepseek(prompts + [prompt])
+
+    def _finish_error_help(self, stderr: str, pending: List[Tuple[str, Union[str, Future]]]) -> str:
+        """打印修复建议并返回翻译后的报错"""
+        results = self._collect_deepseek(pending)
+        print(results[-1])
+        if len(results) == 1:
+            # 空白报错不翻译，与 translate_output 一致
+            return ""
+        return results[0] if results[0] else stderr
+
+    def _suggestion_prompt(self, error_message: str, cmd: str) -> str:
+        """构建错误修复建议提示词"""
+        return (
             "你是一个专业的命令行助手，请根据错误信息给出具体的修复建议。\n"
             f"执行平台:{self.current_platform}\n"
             f"执行命令:{cmd}\n"
@@ -213,9 +569,6 @@ class DeepSeekCLIExecutor:
             f"错误原因:\n"
             f"建议命令:"
         )
-        print(prompt)
-        result = self._call_deepseek(prompt)
-        return result
 
 
 
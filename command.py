@@ -1,6 +1,6 @@
 
 import subprocess
-from typing import Union, List, Optional
+from typing import Union, List, Optional, Tuple
 
 
 def run_command(
@@ -34,6 +34,8 @@ def run_command(
     else:
         # 非交互式命令 - 捕获输出
         try:
+            if _is_simple_command(command):
+                return run_simple_command(command, shell=shell)
             return run_command_interactive(command)
         except subprocess.TimeoutExpired:
             print("命令执行超时")
@@ -43,40 +45,61 @@ def run_command(
         except subprocess.CalledProcessError as e:
             print(f"命令执行失败: {e}")
 
+# 常见的交互式命令
+_INTERACTIVE_COMMANDS: frozenset[str] = frozenset({
+    'vim', 'vi', 'nano', 'emacs',  # 文本编辑器
+    'top', 'htop', 'btm',  # 系统监控
+    'less', 'more', 'man',  # 分页查看器
+    'ipython', 'python', 'python3',  # REPL
+    'bash', 'zsh', 'fish', 'sh',  # Shell
+    'ssh', 'telnet', 'ftp',  # 网络工具
+    'mysql', 'psql', 'sqlite3',  # 数据库客户端
+})
+
+
 def _is_interactive_command(command: Union[str, List[str]]) -> bool:
     """检测命令是否需要交互式终端"""
-    if isinstance(command, str):
-        cmd = command.lower()
-    else:
-        cmd = command[0].lower()
+    cmd = (command if isinstance(command, str) else command[0]).split(None, 1)[0].lower()
+    return cmd in _INTERACTIVE_COMMANDS
 
-    # 常见的交互式命令
-    interactive_commands = {
-        'vim', 'vi', 'nano', 'emacs',  # 文本编辑器
-        'top', 'htop', 'btm',  # 系统监控
-        'less', 'more', 'man',  # 分页查看器
-        'ipython', 'python', 'python3',  # REPL
-        'bash', 'zsh', 'fish', 'sh',  # Shell
-        'ssh', 'telnet', 'ftp',  # 网络工具
-        'mysql', 'psql', 'sqlite3',  # 数据库客户端
-    }
 
-    return cmd in interactive_commands
+# 短时且无需实时输出的命令，直接 subprocess.run 执行
+_SIMPLE_COMMANDS: frozenset[str] = frozenset({
+    'ls', 'pwd', 'echo', 'cat', 'which', 'whoami', 'date', 'uname', 'hostname', 'id',
+})
 
 
-import pty
-import select
+def _is_simple_command(command: Union[str, List[str]]) -> bool:
+    """检测命令是否可跳过进程组/信号/select 设置直接执行"""
+    cmd = (command if isinstance(command, str) else command[0]).split(None, 1)[0]
+    return cmd in _SIMPLE_COMMANDS
 
-from collections import deque
+
+def run_simple_command(
+        command: Union[str, List[str]],
+        shell: bool = False,
+        timeout: Optional[float] = None,
+) -> Tuple[int, str, str]:
+    """运行简单命令并返回 (returncode, stdout, stderr)"""
+    result = subprocess.run(command, shell=shell, capture_output=True, text=True, timeout=timeout)
+    # 保持与 run_command_interactive 一致，输出打印到终端
+    if result.stdout:
+        print(result.stdout, end='', flush=True)
+    if result.stderr:
+        print(result.stderr, end='', file=sys.stderr, flush=True)
+    return result.returncode, result.stdout, result.stderr
+
+
+import pty
+import selectors
 
 
 def run_interactive_command(command):
     """运行交互式命令并返回 exit_code, stdout, stderr"""
     master, slave = pty.openpty()
 
-    # 用于存储 stdout 和 stderr
-    stdout_queue = deque()
-    stderr_queue = deque()
+    # 原始字节统一累积，结束后一次性解码（避免多字节字符被截断）
+    stdout_buf = bytearray()
 
     process = subprocess.Popen(
         command,
@@ -88,24 +111,56 @@ def run_interactive_command(command):
 
     os.close(slave)  # 子进程持有 slave，主进程不再需要
 
+    # 只注册一次，循环内由 epoll/kqueue 返回就绪的 fd
+    sel = selectors.DefaultSelector()
+    stdin_fd = sys.stdin.fileno()
+    stdin_polled = False  # stdin 是否已注册到 selector
+    stdin_open = True  # stdin 是否尚未读到 EOF
+
     try:
+        sel.register(master, selectors.EVENT_READ)
+        try:
+            sel.register(stdin_fd, selectors.EVENT_READ)
+            stdin_polled = True
+        except (PermissionError, ValueError):
+            # stdin 为普通文件等 epoll 不支持的类型（如 `< script.txt`），
+            # 与 select.select 一致，视为始终可读
+            pass
+
         while True:
-            rlist, _, _ = select.select([master, sys.stdin], [], [])
+            # stdin 无法轮询时不能阻塞等待，否则文件输入无法转发给子进程
+            timeout = None if stdin_polled or not stdin_open else 0
+            rlist = [key.fileobj for key, _ in sel.select(timeout)]
 
             if master in rlist:
                 # 从伪终端读取数据（可能是 stdout 或 stderr）
-                data = os.read(master, 1024).decode("utf-8", errors="replace")
+                try:
+                    data = os.read(master, 4096)
+                except OSError:  # Linux 下子进程退出后读取 master 返回 EIO
+                    data = b""
                 if not data:  # EOF（进程结束）
                     break
 
                 # 由于 pty 合并了 stdout/stderr，我们无法直接区分它们
                 # 这里统一当作 stdout 处理（Linux pty 默认合并输出）
-                stdout_queue.append(data)
-                print(data, end="", flush=True)  # 实时打印到终端
+                stdout_buf.extend(data)
+                sys.stdout.buffer.write(data)  # 实时打印到终端
+                sys.stdout.flush()
 
-            if sys.stdin in rlist:
+            if stdin_open and (stdin_fd in rlist or not stdin_polled):
                 # 用户输入 → 发送给子进程
-                user_input = os.read(sys.stdin.fileno(), 1024)
+                user_input = os.read(stdin_fd, 1024)
+                if not user_input:
+                    # stdin 已到 EOF，停止监听避免空转，并向子进程转发 EOF (Ctrl+D)
+                    stdin_open = False
+                    if stdin_polled:
+                        sel.unregister(stdin_fd)
+                    try:
+                        os.write(master, b"\x04")
+                    except OSError:
+                        pass
+                    continue
+
                 if b"\x1b" in user_input:
                     print("\n[Detected ESC key, exiting Insert mode]")
 
@@ -114,11 +169,12 @@ def run_interactive_command(command):
                     break
 
     finally:
+        sel.close()
         os.close(master)
         returncode = process.wait()  # 获取 exit code
 
     # 合并所有输出（pty 无法区分 stdout/stderr）
-    stdout = "".join(stdout_queue)
+    stdout = stdout_buf.decode("utf-8", errors="replace")
     stderr = None  # pty 模式下 stderr 通常为空（合并到 stdout）
 
 
@@ -256,7 +312,6 @@ import signal
 import sys
 import os
 import time
-import select
 from typing import Union, List, Tuple, Optional
 
 import subprocess
@@ -264,7 +319,6 @@ import signal
 import sys
 import os
 import time
-import select
 from typing import Union, List, Tuple, Optional
 
 
@@ -288,13 +342,15 @@ def run_command_interactive(
     """
 
     # 预处理ping命令（关键改进）
-    if isinstance(command, (list, str)) and "ping" in (command[0] if isinstance(command, list) else command):
+    cmd0 = command[0] if isinstance(command, list) else command.split(None, 1)[0]
+    if os.path.basename(cmd0).lower() == "ping":
         command = _adapt_ping_command(command)
 
     # 存储输出
     stdout_data = []
     stderr_data = []
     process = None
+    sel = None
 
     def signal_handler(signum, frame):
         """增强的信号处理"""
@@ -325,6 +381,14 @@ def run_command_interactive(
 
         start_time = time.time()
 
+        sel = selectors.DefaultSelector()
+        if process.stdout:
+            sel.register(process.stdout, selectors.EVENT_READ)
+        if process.stderr:
+            sel.register(process.stderr, selectors.EVENT_READ)
+
+        eof_seen = False
+
         def read_available(stream, buffer, is_stdout=True):
             """可靠的非阻塞读取"""
             while True:
@@ -346,21 +410,22 @@ def run_command_interactive(
                 raise subprocess.TimeoutExpired(command, timeout)
 
             # 非阻塞IO处理
-            readable = []
-            if process.stdout:
-                readable.append(process.stdout)
-            if process.stderr:
-                readable.append(process.stderr)
-
-            if readable:
-                ready, _, _ = select.select(readable, [], [], 0.1)
+            if sel.get_map():
                 activity = False
 
-                for stream in ready:
+                for key, _ in sel.select(0.1):
+                    stream = key.fileobj
                     if stream == process.stdout:
                         activity = read_available(stream, stdout_data) or activity
                     else:
                         activity = read_available(stream, stderr_data, False) or activity
+                    # read_available 只在读到 EOF 时返回，该流不再需要监听
+                    sel.unregister(stream)
+
+                # 两个流都已读到 EOF，无需再 communicate
+                if not sel.get_map():
+                    eof_seen = True
+                    break
 
                 # 无活动且进程已结束则退出
                 if not activity and process.poll() is not None:
@@ -369,7 +434,14 @@ def run_command_interactive(
                 time.sleep(0.1)
 
         # 最终清理（关键保障）
-        remaining_stdout, remaining_stderr = process.communicate(timeout=0.5)
+        if eof_seen:
+            # 管道已读到 EOF，只需关闭并回收进程（communicate 本会负责关闭）
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+            remaining_stdout, remaining_stderr = None, None
+        else:
+            remaining_stdout, remaining_stderr = process.communicate(timeout=0.5)
         if remaining_stdout:
             print(remaining_stdout, end='', flush=True)
             stdout_data.append(remaining_stdout)
@@ -391,6 +463,8 @@ def run_command_interactive(
             os.killpg(os.getpgid(process.pid), signal.SIGKILL) if sys.platform != 'win32' else process.kill()
         raise
     finally:
+        if sel is not None:
+            sel.close()
         # 恢复信号处理
         for sig, handler in original_handlers.items():
             signal.signal(sig, handler)